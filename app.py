@@ -1,11 +1,25 @@
 # app.py
-from flask import Flask, request, jsonify, send_from_directory
+from quart import Quart, Response, request, send_from_directory
 import os
 import json
-from openai import OpenAI
+import orjson
+import asyncio
+import time
+import csv
+import io
+import fcntl
+import queue
+import atexit
+import threading
+import hashlib
+import random
+import string
+import unicodedata
+import httpx
+from collections import OrderedDict
+import openai
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from datetime import datetime
-from flask_cors import CORS
 
 # --- 加载环境变量 ---
 load_dotenv()
@@ -15,19 +29,159 @@ DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
 if not DEEPSEEK_API_KEY:
     raise RuntimeError("请在 .env 中配置 DEEPSEEK_API_KEY")
 
-# 初始化 DeepSeek 客户端
-client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
+# 初始化 DeepSeek 异步客户端（同一事件循环内可并发多个请求）
+# 复用长连接并开启 HTTP/2，多个并发调用可共享同一条 TLS 连接
+# 连接 3 秒、读取 30 秒超时，卡住的连接不会无限期占住请求；重试由 call_model 自己控制
+DEEPSEEK_TIMEOUT = httpx.Timeout(30.0, connect=3.0)
+client = AsyncOpenAI(
+    api_key=DEEPSEEK_API_KEY,
+    base_url="https://api.deepseek.com",
+    timeout=DEEPSEEK_TIMEOUT,
+    max_retries=0,
+    http_client=httpx.AsyncClient(
+        http2=True,
+        timeout=DEEPSEEK_TIMEOUT,
+        limits=httpx.Limits(max_connections=128, max_keepalive_connections=64),
+    ),
+)
+
+# 可选：配置 REDIS_URL 后结果缓存在多个 worker 间共享，否则只用进程内缓存
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    import redis.asyncio as aioredis
+    redis_client = aioredis.from_url(REDIS_URL, decode_responses=True)
+else:
+    redis_client = None
 
 # --- 配置 ---
 MODEL_NAME = "deepseek-chat"   # 或 deepseek-reasoner
 LOGS_CSV = "logs.csv"
+MAX_TOKENS = 256               # 单条结论 + 1–3 句解释 + ≤3 个来源，256 足够
+MAX_BATCH_SIZE = 16            # 单次批量请求的最大条数（受 max_tokens 上限约束）
+CACHE_TTL = 86400              # 结果缓存有效期（秒）
+CACHE_MAX_ITEMS = 1024         # 进程内缓存最多保留的条数
+# 模型未给出来源时使用的占位科研文章（只读，所有响应共享同一份）
+_PLACEHOLDER_SOURCES = [{"title": "Example Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}]
+LOG_FIELDS = ["timestamp", "user_text", "result"]
+LOG_BATCH_SIZE = 128           # 后台日志线程每次最多写入的条数
+MAX_CONCURRENT_CALLS = 32      # 每个 worker 同时在途的 DeepSeek 请求上限
+MIN_TEXT_LEN = 4               # 中文四个字即可成句（如“吃糖致癌”），故下限取 4
+MAX_TEXT_LEN = 2000
 
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "https://health-rumor-detector.onrender.com"}})
+ALLOWED_ORIGIN = "https://health-rumor-detector.onrender.com"
+_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Max-Age": "86400",   # 浏览器可缓存预检结果一天
+}
 
-def build_prompt(user_text: str) -> str:
-    prompt = f"""
+
+app = Quart(__name__)
+
+# --- CORS ---
+# 只有一个允许的来源，直接写固定响应头，不必每次解析和匹配来源列表
+@app.before_request
+async def _cors_preflight():
+    # 只应答已注册路由的预检；未知路径的 url_rule 为 None，照常返回 404
+    if request.method == "OPTIONS" and request.url_rule is not None:
+        return "", 204, _PREFLIGHT_HEADERS
+
+@app.after_request
+async def _cors(response):
+    response.headers["Access-Control-Allow-Origin"] = ALLOWED_ORIGIN
+    response.headers["Vary"] = "Origin"
+    return response
+
+# --- 结果缓存 ---
+# 只做精确匹配：归一化后相同的陈述才命中。不做语义近邻匹配，
+# 因为 “会导致” 与 “不会导致” 这类只差一个否定词的句子相似度极高，结论却相反。
+_local_cache = OrderedDict()   # key -> (过期时间, result)
+
+
+_KEEP_EDGE_CHARS = "%‰‱-"      # 数值的一部分（“降低 50%”、“-5 度”），首尾也不去掉
+
+
+def _is_edge_char(ch: str) -> bool:
+    if ch in _KEEP_EDGE_CHARS:
+        return False
+    return ch.isspace() or unicodedata.category(ch).startswith("P")
+
+
+def normalize_text(text: str) -> str:
+    """
+    NFKC + casefold，连续空白合并为一个空格，只去掉首尾的空白和标点。
+    句中的标点一律保留：“1.5 克” 与 “15 克”、“30%” 与 “30” 是不同的陈述。
+    """
+    text = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+    start, end = 0, len(text)
+    while start < end and _is_edge_char(text[start]):
+        start += 1
+    while end > start and _is_edge_char(text[end - 1]):
+        end -= 1
+    return text[start:end]
+
+
+def cache_key(user_text: str) -> str:
+    return "analyze:" + hashlib.sha256(normalize_text(user_text).encode("utf-8")).hexdigest()
+
+
+async def cache_get(key: str):
+    if redis_client is not None:
+        try:
+            value = await redis_client.get(key)
+        except Exception:
+            return None
+        return orjson.loads(value) if value else None
+
+    item = _local_cache.get(key)
+    if item is None:
+        return None
+    expires_at, result = item
+    if expires_at < time.monotonic():
+        _local_cache.pop(key, None)
+        return None
+    _local_cache.move_to_end(key)
+    return result
+
+
+async def cache_set(key: str, result: dict):
+    # 调用失败或模型无法给出结论的结果不缓存，下次仍会重新请求
+    if result.get("conclusion") == "unknown":
+        return
+    if redis_client is not None:
+        try:
+            await redis_client.setex(key, CACHE_TTL, orjson.dumps(result))
+        except Exception:
+            pass
+        return
+
+    _local_cache[key] = (time.monotonic() + CACHE_TTL, result)
+    _local_cache.move_to_end(key)
+    while len(_local_cache) > CACHE_MAX_ITEMS:
+        _local_cache.popitem(last=False)
+
+
+# --- 并发控制 ---
+_model_slots = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+_inflight: dict[str, asyncio.Task] = {}
+
+
+async def single_flight(key: str, make_call):
+    """
+    同一 key 同时只发起一次调用，并发的重复请求等待同一个结果。
+    每个等待方都用 shield 包住共享任务，某个客户端断开不会取消其他人的调用。
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(make_call())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+# 提示词模板在导入时构建一次，请求时只做替换
+_PROMPT_TMPL = string.Template("""
 You are a careful medical-information fact-checking assistant.
 
 A user will provide a short statement about a **disease, symptom, treatment, or health claim**.
@@ -39,139 +193,510 @@ Your task:
 4) Reply in **STRICT JSON format** with keys: conclusion, explanation, sources (list).
 
 User statement:
-\"\"\"{user_text}\"\"\"
+\"\"\"$user_text\"\"\"
 
 Respond strictly in JSON like:
-{{
+{
   "conclusion": "accurate",
   "explanation": "Short reason with clarification.",
   "sources": [
-     {{"title": "Relevant Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}}
+     {"title": "Relevant Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}
+  ]
+}
+
+IMPORTANT:
+- Output must be valid JSON only (no markdown or extra text).
+- Keys and values must use double quotes.
+- Do NOT include comments or trailing commas.
+- Do NOT wrap the JSON in code blocks.
+""")
+
+_BATCH_PROMPT_TMPL = string.Template("""
+You are a careful medical-information fact-checking assistant.
+
+A user will provide a numbered list of short statements about a **disease, symptom, treatment, or health claim**.
+
+Your task, for EACH statement:
+1) Judge whether the statement is **accurate**, **partially correct**, or **medical misinformation (rumor)**.
+2) Provide a short, clear explanation (1–3 sentences) to clarify the truth.
+3) Provide **authoritative reference links ONLY** from scientific papers or recognized medical organizations (e.g., WHO, NIH, CDC, PubMed, Mayo Clinic). 
+4) Reply in **STRICT JSON format**: one object whose "results" array has one object per statement, keys: id, conclusion, explanation, sources (list).
+
+User statements:
+$statements
+
+Respond strictly in JSON like:
+{
+  "results": [
+    {
+      "id": 1,
+      "conclusion": "accurate",
+      "explanation": "Short reason with clarification.",
+      "sources": [
+         {"title": "Relevant Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}
+      ]
+    }
   ]
-}}
+}
 
 IMPORTANT:
 - Output must be valid JSON only (no markdown or extra text).
+- The "id" must match the statement number; return exactly $count objects.
 - Keys and values must use double quotes.
 - Do NOT include comments or trailing commas.
 - Do NOT wrap the JSON in code blocks.
-"""
-    return prompt
+""")
+
 
+def _escape_quotes(user_text: str) -> str:
+    """转义用户输入中的三引号，避免模型看到不成对的分隔符。"""
+    return user_text.replace('"""', r'\"\"\"')
 
-def call_model(prompt: str, retries=2):
+
+def build_prompt(user_text: str) -> str:
+    return _PROMPT_TMPL.substitute(user_text=_escape_quotes(user_text))
+
+
+def build_batch_prompt(texts: list[str]) -> str:
+    """把多条用户陈述编号后合并成一个 prompt，要求模型在 results 数组中逐条返回。"""
+    numbered = "\n".join(f'{i}. """{_escape_quotes(t)}"""' for i, t in enumerate(texts, 1))
+    return _BATCH_PROMPT_TMPL.substitute(statements=numbered, count=len(texts))
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def extract_json(text: str):
     """
-    调用 DeepSeek AI，并保证返回严格 JSON。
-    如果模型输出为空或不可解析，会尝试重试。
+    从模型输出中取出第一个 JSON 对象，解析失败返回 None。
+    raw_decode 单次扫描，停在该值结尾处，因此前后多余的说明文字不影响解析。
     """
-    import time
-    for attempt in range(retries + 1):
-        try:
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.0,
-                max_tokens=500
-            )
-
-            # DeepSeek 最新接口返回对象属性为 .message.content
-            try:
-                text = response.choices[0].message.content.strip()
-            except AttributeError:
-                text = ""
+    start = text.find("{")
+    if start < 0:
+        return None
+    try:
+        obj, _ = _JSON_DECODER.raw_decode(text, start)
+    except ValueError:
+        return None
+    return obj
 
-            # 尝试解析 JSON
-            try:
-                start = text.find("{")
-                end = text.rfind("}") + 1
-                json_text = text[start:end]
-                parsed = json.loads(json_text)
-            except Exception:
-                parsed = None
-
-            # 如果解析成功，返回
-            if parsed:
-                for key in ["conclusion", "explanation", "sources"]:
-                    if key not in parsed:
-                        parsed[key] = [] if key == "sources" else "unknown"
-                return json.dumps(parsed, ensure_ascii=False), response
-
-            # 如果失败，等待 1 秒重试
-            time.sleep(1)
 
+async def read_json_stream(stream):
+    """
+    边接收边解析：每当新片段里出现 “}” 就尝试解析，拿到完整 JSON 对象后立即关闭流，
+    不再等待后面的空白或多余文字。返回 (解析结果或 None, 已收到的文本)。
+    """
+    parts = []
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if "}" in delta:
+                parsed = extract_json("".join(parts))
+                if parsed is not None:
+                    return parsed, "".join(parts).strip()
+    finally:
+        await stream.close()
+
+    text = "".join(parts).strip()
+    return extract_json(text), text
+
+
+def _is_retryable(e: Exception) -> bool:
+    """429 / 5xx / 网络错误（含超时）值得重试；其余 4xx 说明请求本身有问题，重试无用。"""
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return isinstance(e, (openai.APIConnectionError, httpx.TransportError))
+
+
+async def _backoff(attempt: int):
+    """带随机抖动的指数退避，避免 DeepSeek 故障恢复时所有请求同时重试。"""
+    await asyncio.sleep(random.uniform(0.1, 0.4) * 2 ** attempt)
+
+
+def _fill_defaults(parsed: dict) -> dict:
+    """模型漏掉的键补上默认值。"""
+    for key in ["conclusion", "explanation", "sources"]:
+        if key not in parsed:
+            parsed[key] = [] if key == "sources" else "unknown"
+    return parsed
+
+
+async def _call_with_retry(make_request, parse, retries=2):
+    """
+    统一的重试策略：make_request() 发起一次调用并返回模型输出，parse(output) 解析成功时
+    返回结果、失败时返回 None。可重试的 API 错误退避后重试；不可解析的输出只立即重试一次。
+    返回 (结果或 None, 最后一次错误信息)。
+    """
+    last_error = ""
+    parse_retried = False
+    for attempt in range(retries + 1):
+        try:
+            async with _model_slots:
+                output = await make_request()
         except Exception as e:
             last_error = str(e)
-            time.sleep(1)
+            if not _is_retryable(e) or attempt == retries:
+                break
+            await _backoff(attempt)
+            continue
+
+        result = parse(output)
+        if result is not None:
+            return result, ""
+
+        if parse_retried:
+            break
+        parse_retried = True
+
+    return None, last_error
+
+
+async def call_model(prompt: str, retries=2):
+    """
+    调用 DeepSeek AI（流式），返回 (解析后的 dict, 模型原始文本)。
+    重试策略见 _call_with_retry。
+    """
+    async def make_request():
+        stream = await client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+            max_tokens=MAX_TOKENS,
+            response_format={"type": "json_object"},
+            stop=["\n\n\n"],
+            stream=True
+        )
+        return await read_json_stream(stream)
+
+    def parse(output):
+        parsed, text = output
+        if isinstance(parsed, dict) and parsed:
+            return _fill_defaults(parsed), text
+        return None
+
+    result, last_error = await _call_with_retry(make_request, parse, retries)
+    if result is not None:
+        return result
 
     # 所有尝试失败，返回默认结构
-    return json.dumps({
+    return {
         "conclusion": "unknown",
-        "explanation": f"DeepSeek API 调用失败或模型返回不可解析: {last_error if 'last_error' in locals() else ''}",
-        "sources": [{"title": "Example Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}]
-    }, ensure_ascii=False), None
+        "explanation": f"DeepSeek API 调用失败或模型返回不可解析: {last_error}",
+        "sources": _PLACEHOLDER_SOURCES
+    }, ""
+
+def _batch_item_id(value):
+    """模型给出的 id 可能是整数或数字字符串；其他形状（含 1e400 这类浮点数）一律忽略。"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+def _parse_batch(text: str, count: int):
+    """把批量输出按 id 拆回 count 条，返回 (dict 列表, 每条的原始输出)；整体不可解析时返回 None。"""
+    obj = extract_json(text)
+    items = obj.get("results") if isinstance(obj, dict) else None
+    if not isinstance(items, list) or not items:
+        return None
+
+    items = [item for item in items if isinstance(item, dict)]
+    by_id = {}
+    for item in items:
+        item_id = _batch_item_id(item.get("id"))
+        if item_id is not None:
+            by_id[item_id] = item
+    if not by_id:
+        # 没有可用的 id：条数对得上就按顺序对应，否则视为不可解析，交给重试
+        if len(items) != count:
+            return None
+        by_id = dict(enumerate(items, 1))
+    results, raws = [], []
+    for i in range(1, count + 1):
+        item = by_id.get(i)
+        # 用标准库编码：模型可能返回 orjson 无法编码的超长整数
+        raws.append(json.dumps(item, ensure_ascii=False) if item is not None else "")
+        parsed = item or {
+            "conclusion": "unknown",
+            "explanation": "模型未返回该条目的结果。",
+        }
+        parsed.pop("id", None)
+        results.append(_fill_defaults(parsed))
+    return results, raws
 
-import csv
+async def call_model_batch(prompt: str, count: int, retries=2):
+    """
+    一次调用 DeepSeek 处理 count 条陈述，返回 (按 id 顺序排列的 dict 列表, 每条对应的原始输出)。
+    每条的原始输出只含模型为该条返回的对象，不含同批其他陈述的结果。
+    模型漏掉的条目用 unknown 占位。重试策略见 _call_with_retry。
+    """
+    async def make_request():
+        response = await client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+            max_tokens=MAX_TOKENS * count,
+            response_format={"type": "json_object"},
+            stop=["\n\n\n"],
+            # 非流式，整批生成完才返回，读取超时按条数放宽
+            timeout=httpx.Timeout(DEEPSEEK_TIMEOUT.read * count, connect=DEEPSEEK_TIMEOUT.connect)
+        )
+        try:
+            return response.choices[0].message.content.strip()
+        except AttributeError:
+            return ""
 
-def append_log(entry: dict):
-    file_exists = os.path.exists(LOGS_CSV)
-    with open(LOGS_CSV, mode='a', newline='', encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=["timestamp", "user_text", "result"])
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(entry)
+    result, last_error = await _call_with_retry(make_request, lambda text: _parse_batch(text, count), retries)
+    if result is not None:
+        return result
 
-# 支持前端 index.html
-@app.route('/')
-def index():
-    return send_from_directory('.', 'index.html')
+    # 所有尝试失败，每条返回默认结构
+    return [{
+        "conclusion": "unknown",
+        "explanation": f"DeepSeek API 调用失败或模型返回不可解析: {last_error}",
+        "sources": _PLACEHOLDER_SOURCES
+    } for _ in range(count)], [""] * count
+
+# --- 日志 ---
+# 请求线程只把日志放进队列，由后台线程攒批后写入 logs.csv。
+# 多个 worker 进程共用同一个文件：每批先在内存里编码好，再在 flock 排他锁内一次写入，
+# 表头（带 BOM）也在锁内、仅当文件为空时写一次，不会出现重复表头或交错的行。
+log_queue = queue.Queue()
+_LOG_HEADER = ("\ufeff" + ",".join(LOG_FIELDS) + "\r\n").encode("utf-8")
+
+
+def _drain_logs(q: queue.Queue, n: int, timeout: float) -> list:
+    """阻塞等待第一条日志，再尽量多取，最多 n 条。"""
+    batch = [q.get(timeout=timeout)]
+    while len(batch) < n:
+        try:
+            batch.append(q.get_nowait())
+        except queue.Empty:
+            break
+    return batch
 
-@app.route("/analyze", methods=["POST"])
-def analyze():
-    data = request.get_json(force=True)
-    user_text = data.get("text", "").strip()
-    if not user_text:
-        return jsonify({"error": "No text provided."}), 400
 
-    prompt = build_prompt(user_text)
+def _encode_rows(entries: list) -> bytes:
+    buf = io.StringIO(newline="")
+    csv.DictWriter(buf, fieldnames=LOG_FIELDS).writerows(entries)
+    return buf.getvalue().encode("utf-8")
 
-    try:
-        model_text, raw_response = call_model(prompt)
-    except Exception as e:
-        return jsonify({"error": f"DeepSeek API failed: {str(e)}"}), 500
 
-    # 尝试解析 JSON
-    try:
-        start = model_text.find("{")
-        end = model_text.rfind("}") + 1
-        json_text = model_text[start:end]
-        parsed = json.loads(json_text)
-    except Exception:
-        parsed = {
-            "conclusion": "unknown",
-            "explanation": "模型返回不可解析的结果。",
-            "sources": [{"title": "Example Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}]
-        }
+def _log_writer():
+    with open(LOGS_CSV, mode="ab") as f:
+        while True:
+            try:
+                batch = _drain_logs(log_queue, LOG_BATCH_SIZE, timeout=0.5)
+            except queue.Empty:
+                continue
+            # None 是退出信号：写完它之前的日志后结束
+            stop = None in batch
+            data = _encode_rows([entry for entry in batch if entry is not None])
+            if data:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        data = _LOG_HEADER + data
+                    f.write(data)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            if stop:
+                return
+
+
+_log_thread = threading.Thread(target=_log_writer, name="log-writer", daemon=True)
+_log_thread.start()
+
+
+@atexit.register
+def _flush_logs():
+    log_queue.put(None)
+    _log_thread.join(timeout=5)
+
+def prefilter(user_text: str):
+    """
+    本地快速判断输入是否值得发给模型；不值得时返回原因，否则返回 None。
+    只拦明显没有内容的输入（长度不符、没有任何文字）。话题是否与健康有关交给模型判断，
+    关键词表总会漏掉真正的健康谣言（如 “5G 传播新冠”），那种误拦比多一次调用代价大得多。
+    """
+    if len(user_text) < MIN_TEXT_LEN:
+        return "输入过短，请提供完整的健康相关陈述。"
+    if len(user_text) > MAX_TEXT_LEN:
+        return f"输入过长，请控制在 {MAX_TEXT_LEN} 字以内。"
+    # isalpha 对中文等文字也成立；纯数字、标点、表情符号不成句
+    if not any(ch.isalpha() for ch in user_text):
+        return "未识别到文字内容，请输入完整的健康相关陈述。"
+    return None
+
+def insufficient_result(reason: str) -> dict:
+    return {
+        "conclusion": "insufficient_input",
+        "explanation": reason,
+        "sources": [],
+        "raw_model_output": ""
+    }
 
+def _clean_sources(sources) -> list:
+    """只保留 title 与 link 都是字符串的来源条目，其余字段和格式不对的条目丢弃。"""
+    if not isinstance(sources, list):
+        return []
+    return [
+        {"title": src["title"], "link": src["link"]}
+        for src in sources
+        if isinstance(src, dict) and isinstance(src.get("title"), str) and isinstance(src.get("link"), str)
+    ]
+
+def build_result(parsed: dict, model_text: str) -> dict:
+    """
+    清洗模型输出并组装返回结构（日志由调用方按各自的 user_text 记录）。
+    结果会进缓存、日志和响应，只保留已知字段的字符串值，避免超出 64 位的整数这类
+    orjson 无法编码的值进入缓存后每次命中都出错。
+    """
+    conclusion = parsed.get("conclusion")
+    explanation = parsed.get("explanation")
     # 保证 sources 至少有占位科研文章
-    if parsed.get("sources") in (None, [], ""):
-        parsed["sources"] = [{"title": "Example Scientific Source", "link": "https://www.ncbi.nlm.nih.gov/pmc/articles/"}]
+    sources = _clean_sources(parsed.get("sources")) or _PLACEHOLDER_SOURCES
 
     result = {
-        "conclusion": parsed.get("conclusion"),
-        "explanation": parsed.get("explanation"),
-        "sources": parsed.get("sources"),
+        "conclusion": conclusion if isinstance(conclusion, str) else "unknown",
+        "explanation": explanation if isinstance(explanation, str) else "unknown",
+        "sources": sources,
         "raw_model_output": model_text
     }
+    return result
 
+async def analyze_uncached(key: str, prompt: str) -> dict:
+    """
+    调用模型、组装结果并写入缓存。通过 single_flight 共享时整个过程只执行一次，
+    结果先进缓存再离开 _inflight，之后的相同请求直接命中缓存。
+    """
+    parsed, model_text = await call_model(prompt)
+    result = build_result(parsed, model_text)
+    await cache_set(key, result)
+    return result
+
+_last_ts = [0, ""]   # [秒级时间戳, 对应的 ISO 字符串]
+
+def now_iso() -> str:
+    """UTC 时间，精确到秒；同一秒内的日志复用已格式化的字符串。"""
+    t = int(time.time())
+    if t != _last_ts[0]:
+        _last_ts[0] = t
+        _last_ts[1] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t))
+    return _last_ts[1]
+
+def log_result(user_text: str, result: dict):
     # 记录日志
     log_entry = {
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": now_iso(),
         "user_text": user_text,
-        "result": json.dumps(result, ensure_ascii=False)
+        "result": orjson.dumps(result).decode()
     }
-    append_log(log_entry)
+    log_queue.put_nowait(log_entry)
+
+def _json_response(obj, status=200):
+    """orjson 直接输出 UTF-8 字节，不排序键、不再二次拷贝。"""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+# 支持前端 index.html
+@app.route('/')
+async def index():
+    return await send_from_directory('.', 'index.html')
+
+@app.route("/analyze", methods=["POST"])
+async def analyze():
+    data = await request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return _json_response({"error": "Request body must be a JSON object."}, 400)
+    user_text = data.get("text", "")
+    if not isinstance(user_text, str):
+        return _json_response({"error": "text must be a string."}, 400)
+    user_text = user_text.strip()
+    if not user_text:
+        return _json_response({"error": "No text provided."}, 400)
 
-    return jsonify(result), 200
+    reason = prefilter(user_text)
+    if reason:
+        result = insufficient_result(reason)
+        log_result(user_text, result)
+        return _json_response(result)
 
-if __name__ == "__main__":
+    key = cache_key(user_text)
+    cached = await cache_get(key)
+    if cached is not None:
+        log_result(user_text, cached)
+        return _json_response(cached)
+
+    prompt = build_prompt(user_text)
+
+    try:
+        result = await single_flight(key, lambda: analyze_uncached(key, prompt))
+    except Exception as e:
+        return _json_response({"error": f"DeepSeek API failed: {str(e)}"}, 500)
+
+    log_result(user_text, result)
+    return _json_response(result)
+
+@app.route("/analyze_batch", methods=["POST"])
+async def analyze_batch():
+    data = await request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return _json_response({"error": "Request body must be a JSON object."}, 400)
+    texts = data.get("texts")
+    if not isinstance(texts, list):
+        return _json_response({"error": "texts must be a list."}, 400)
+    if not texts:
+        return _json_response({"error": "No text provided."}, 400)
+    # 逐条校验而不是悄悄丢弃，保证 results[i] 始终对应 texts[i]
+    for i, t in enumerate(texts):
+        if not isinstance(t, str):
+            return _json_response({"error": f"texts[{i}] must be a string."}, 400)
+        if not t.strip():
+            return _json_response({"error": f"texts[{i}] is empty."}, 400)
+    user_texts = [t.strip() for t in texts]
+    if len(user_texts) > MAX_BATCH_SIZE:
+        return _json_response({"error": f"At most {MAX_BATCH_SIZE} texts per batch."}, 400)
+
+    # 未通过预筛或命中缓存的条目不再发给模型
+    keys = [cache_key(t) for t in user_texts]
+    known = []
+    for user_text, key in zip(user_texts, keys):
+        reason = prefilter(user_text)
+        known.append(insufficient_result(reason) if reason else await cache_get(key))
+    # 同一批里归一化后相同的陈述只发给模型一次
+    misses = {}
+    for user_text, key, hit in zip(user_texts, keys, known):
+        if hit is None and key not in misses:
+            misses[key] = user_text
+
+    fresh = {}
+    if misses:
+        prompt = build_batch_prompt(list(misses.values()))
+        try:
+            parsed_list, raw_list = await call_model_batch(prompt, len(misses))
+        except Exception as e:
+            return _json_response({"error": f"DeepSeek API failed: {str(e)}"}, 500)
+        for key, parsed, raw in zip(misses, parsed_list, raw_list):
+            result = build_result(parsed, raw)
+            await cache_set(key, result)
+            fresh[key] = result
+
+    results = []
+    for user_text, key, hit in zip(user_texts, keys, known):
+        result = hit if hit is not None else fresh[key]
+        log_result(user_text, result)
+        results.append(result)
+    return _json_response({"results": results})
+
+# 本地调试：DEV=1 python app.py
+# 生产环境请用 ASGI 服务器启动（见 Procfile），不要使用内置开发服务器
+if __name__ == "__main__" and os.getenv("DEV"):
     app.run(debug=True, port=5000)